@@ -1,6 +1,9 @@
-from typing import List, Type, Dict, Any
+from functools import lru_cache
+from typing import Iterator, List, Type, Dict, Any, Tuple
+import orjson
+import os
 from pydantic import BaseModel
-from src.utils import pydantic_to_json_schema, save_to_jsonl
+from src.utils import pydantic_to_json_schema
 from pathlib import Path
 
 def format_batch_request(
@@ -14,24 +17,72 @@ def format_batch_request(
     Format requests for the batch API input file.
     """
     response_format = pydantic_to_json_schema(response_model)
+    # Build the invariant parts once; each request only allocates the varying bits
+    system_msg = {"role": "system", "content": system_message}
+    base_body = {
+        "model": model,
+        "max_tokens": max_tokens,
+        "response_format": response_format
+    }
     return [
         {
             "custom_id": f"request-{i}",
             "method": "POST",
             "url": "/v1/chat/completions",
             "body": {
-                "model": model,
-                "messages": [
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": prompt}
-                ],
-                "max_tokens": max_tokens,
-                "response_format": response_format
+                **base_body,
+                "messages": [system_msg, {"role": "user", "content": prompt}]
             }
         }
         for i, prompt in enumerate(prompts, start=1)
     ]
 
+@lru_cache(maxsize=None)
+def _line_template(
+    system_message: str,
+    response_model: Type[BaseModel],
+    model: str,
+    max_tokens: int
+) -> Tuple[bytes, bytes]:
+    """
+    Pre-serialized invariant byte fragments for one batch configuration.
+
+    Cached so repeated batches with the same system message, model, and
+    response model specialize the encoder once and reuse it.
+    """
+    response_format_bytes = orjson.dumps(pydantic_to_json_schema(response_model))
+    body_prefix = (
+        b'","method":"POST","url":"/v1/chat/completions","body":{"model":'
+        + orjson.dumps(model)
+        + b',"messages":[{"role":"system","content":'
+        + orjson.dumps(system_message)
+        + b'},{"role":"user","content":'
+    )
+    body_suffix = (
+        b'}],"max_tokens":' + str(max_tokens).encode()
+        + b',"response_format":' + response_format_bytes + b'}}\n'
+    )
+    return body_prefix, body_suffix
+
+def _encode_batch_lines(
+    prompts: List[str],
+    system_message: str,
+    response_model: Type[BaseModel],
+    model: str,
+    max_tokens: int
+) -> Iterator[bytes]:
+    """
+    Encode batch request lines straight to bytes, splicing each prompt into
+    the cached invariant fragments. orjson.dumps on the prompt keeps escaping
+    correct.
+    """
+    body_prefix, body_suffix = _line_template(system_message, response_model, model, max_tokens)
+    for i, prompt in enumerate(prompts, start=1):
+        yield (
+            b'{"custom_id":"request-' + str(i).encode()
+            + body_prefix + orjson.dumps(prompt) + body_suffix
+        )
+
 def prepare_batch_file(
     prompts: List[str],
     response_model: Type[BaseModel],
@@ -44,9 +95,13 @@ def prepare_batch_file(
     """Prepare batch request file and return its path."""
     save_dir.mkdir(parents=True, exist_ok=True)
 
-    batch_requests = format_batch_request(prompts, system_message, response_model, model, max_tokens)
     input_file_path = save_dir / f"{filename_prefix}_batch_input.jsonl"
-    save_to_jsonl(batch_requests, str(input_file_path))
+    # Write to a temp file in the same directory and move it into place, so the
+    # final path never holds a partially written file
+    tmp_path = input_file_path.with_suffix('.jsonl.tmp')
+    with open(tmp_path, 'wb', buffering=256 * 1024) as f:
+        f.writelines(_encode_batch_lines(prompts, system_message, response_model, model, max_tokens))
+    os.replace(tmp_path, input_file_path)
 
     print(f"Batch input file created at: {input_file_path}")
     return input_file_path
\ No newline at end of file
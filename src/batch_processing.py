@@ -1,4 +1,3 @@
-import shutil
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 import time
@@ -24,8 +23,15 @@ def create_batch_job(file_id: str) -> str:
     return batch.id
 
 def wait_for_batch_completion(batch_id: str, polling_interval: int = 60) -> Dict[str, Any]:
-    """Poll for batch job completion and return the completed batch object."""
+    """
+    Poll for batch job completion and return the completed batch object.
+
+    Polls with exponential backoff starting at 1 second and capped at
+    polling_interval, so fast jobs are detected quickly without hammering
+    the API on long-running ones.
+    """
     client = get_openai_client()
+    delay = 1.0
     while True:
         batch = client.batches.retrieve(batch_id)
         if batch.status == "completed":
@@ -33,8 +39,9 @@ def wait_for_batch_completion(batch_id: str, polling_interval: int = 60) -> Dict
             return batch
         elif batch.status in ["failed", "expired", "cancelled"]:
             raise Exception(f"Batch job {batch_id} {batch.status}")
-        print(f"Batch status: {batch.status}. Waiting {polling_interval} seconds...")
-        time.sleep(polling_interval)
+        print(f"Batch status: {batch.status}. Waiting {delay:.1f} seconds...")
+        time.sleep(delay)
+        delay = min(delay * 1.7, polling_interval)
 
 def process_batch_results(batch_id: str, save_dir: Path, filename_prefix: Optional[str] = None) -> Path:
     """
@@ -56,10 +63,11 @@ def process_batch_results(batch_id: str, save_dir: Path, filename_prefix: Option
     else:
         output_file_path = save_dir / f"{batch_id}.jsonl"
     
-    # Download and save the file
+    # Download and save the file; 1 MiB chunks written unbuffered, since an
+    # intermediate buffer would just add a memcpy per chunk
     response = client.files.content(output_file_id)
-    with open(output_file_path, 'wb') as f:
-        for chunk in response.iter_bytes():
+    with open(output_file_path, 'wb', buffering=0) as f:
+        for chunk in response.iter_bytes(chunk_size=1024 * 1024):
             f.write(chunk)
     
     print(f"Batch results saved to: {output_file_path}")
@@ -1,4 +1,4 @@
-import json
+import orjson
 import random
 from pathlib import Path
 from typing import List, Dict, Any, Tuple
@@ -30,40 +30,15 @@ def prepare_finetuning_data(
     train_dir.mkdir(parents=True, exist_ok=True)
     test_dir.mkdir(parents=True, exist_ok=True)
     
-    # Read batch input and output
-    with open(batch_input_path, 'r') as f_in, open(batch_output_path, 'r') as f_out:
-        batch_inputs = [json.loads(line) for line in f_in]
-        batch_outputs = [json.loads(line) for line in f_out]
-    
-    # Combine inputs and outputs
-    finetuning_data = []
-    for input_item, output_item in zip(batch_inputs, batch_outputs):
-        messages = input_item['body']['messages']
-        system_message = next(msg['content'] for msg in messages if msg['role'] == 'system')
-        user_message = next(msg['content'] for msg in messages if msg['role'] == 'user')
-        
-        # Get the assistant's message from the output, preserving the JSON structure
-        assistant_message = output_item['response']['body']['choices'][0]['message']['content']
-        
-        finetuning_item = {
-            "messages": [
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": user_message},
-                {"role": "assistant", "content": assistant_message}
-            ]
-        }
-        finetuning_data.append(finetuning_item)
-    
-    # Shuffle the data
-    random.shuffle(finetuning_data)
-    
-    # Calculate the split index
-    split_index = int(len(finetuning_data) * 0.8)
-    
-    # Split the data
-    train_data = finetuning_data[:split_index]
-    test_data = finetuning_data[split_index:]
-    
+    # First pass: count records so the shuffled train/test split can be assigned
+    # up front without holding any records in memory
+    with open(batch_input_path, 'rb') as f_in:
+        total_items = sum(1 for _ in f_in)
+
+    split_index = int(total_items * 0.8)
+    is_train = [True] * split_index + [False] * (total_items - split_index)
+    random.shuffle(is_train)
+
     # Prepare filenames
     if output_filename_prefix:
         train_file = train_dir / f"{output_filename_prefix}_train.jsonl"
@@ -71,16 +46,36 @@ def prepare_finetuning_data(
     else:
         train_file = train_dir / f"finetuning_train_{batch_input_path.stem}.jsonl"
         test_file = test_dir / f"finetuning_test_{batch_input_path.stem}.jsonl"
-    
-    # Save training data
-    with open(train_file, 'w') as f:
-        for item in train_data:
-            f.write(json.dumps(item) + '\n')
-    
-    # Save testing data
-    with open(test_file, 'w') as f:
-        for item in test_data:
-            f.write(json.dumps(item) + '\n')
+
+    # Second pass: stream input/output pairs and write each combined record
+    # immediately, so peak memory stays O(1) in the dataset size
+    with open(batch_input_path, 'rb') as f_in, open(batch_output_path, 'rb') as f_out, \
+         open(train_file, 'wb', buffering=256 * 1024) as f_train, \
+         open(test_file, 'wb', buffering=256 * 1024) as f_test:
+        for i, (assign_train, (in_line, out_line)) in enumerate(zip(is_train, zip(f_in, f_out))):
+            input_item = orjson.loads(in_line)
+            output_item = orjson.loads(out_line)
+            messages = input_item['body']['messages']
+            # format_batch_request always emits [system, user], so index directly
+            # instead of scanning for roles; verify the invariant on the first record
+            if i == 0:
+                assert [msg['role'] for msg in messages] == ['system', 'user'], \
+                    f"Expected [system, user] messages, got roles: {[msg['role'] for msg in messages]}"
+            system_message = messages[0]['content']
+            user_message = messages[1]['content']
+
+            # Get the assistant's message from the output, preserving the JSON structure
+            assistant_message = output_item['response']['body']['choices'][0]['message']['content']
+
+            finetuning_item = {
+                "messages": [
+                    {"role": "system", "content": system_message},
+                    {"role": "user", "content": user_message},
+                    {"role": "assistant", "content": assistant_message}
+                ]
+            }
+            target = f_train if assign_train else f_test
+            target.write(orjson.dumps(finetuning_item, option=orjson.OPT_APPEND_NEWLINE))
     
     print(f"Training data saved to: {train_file}")
     print(f"Testing data saved to: {test_file}")
@@ -98,13 +93,14 @@ def validate_finetuning_data(file_path: Path) -> bool:
     True if the file is valid, False otherwise
     """
     try:
-        with open(file_path, 'r') as f:
+        with open(file_path, 'rb') as f:
             for i, line in enumerate(f):
-                item = json.loads(line)
+                item = orjson.loads(line)
                 if not isinstance(item, dict):
                     print(f"Error: Item {i} is not a dictionary")
                     return False
-                if list(item.keys()) != ['messages']:
+                # len + membership checks avoid allocating key lists/sets per record
+                if len(item) != 1 or 'messages' not in item:
                     print(f"Error: Item {i} should only have a 'messages' key")
                     return False
                 if not isinstance(item['messages'], list) or len(item['messages']) != 3:
@@ -115,7 +111,7 @@ def validate_finetuning_data(file_path: Path) -> bool:
                     print(f"Error: Item {i} has incorrect message roles: {roles}")
                     return False
                 for j, msg in enumerate(item['messages']):
-                    if set(msg.keys()) != {'role', 'content'}:
+                    if len(msg) != 2 or 'role' not in msg or 'content' not in msg:
                         print(f"Error: Message {j} in item {i} has incorrect keys")
                         return False
                     if not isinstance(msg['role'], str) or not isinstance(msg['content'], str):
@@ -126,12 +122,12 @@ def validate_finetuning_data(file_path: Path) -> bool:
                         return False
                 # Validate that assistant's message is valid JSON
                 try:
-                    json.loads(item['messages'][2]['content'])
-                except json.JSONDecodeError:
+                    orjson.loads(item['messages'][2]['content'])
+                except orjson.JSONDecodeError:
                     print(f"Error: Assistant's message in item {i} is not valid JSON")
                     return False
         return True
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         print(f"Error: Invalid JSON in file")
         return False
     except Exception as e:
@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 from src.utils import get_openai_client
@@ -34,10 +35,13 @@ def prepare_and_start_finetuning(
     model: str,
     suffix: str
 ) -> str:
-    training_file_id = upload_finetuning_file(training_file_path)
-    
-    validation_file_id = upload_finetuning_file(validation_file_path)
-    
+    # The two uploads are independent network calls, so overlap them
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        training_file_id, validation_file_id = executor.map(
+            upload_finetuning_file,
+            [training_file_path, validation_file_path]
+        )
+
     job_id = create_finetuning_job(
         training_file_id,
         validation_file_id,
@@ -1,21 +1,57 @@
-from typing import Type, Any, Dict, List
-from pydantic import BaseModel
-from openai import OpenAI
+import asyncio
+from functools import lru_cache
+from typing import TYPE_CHECKING, Type, Any, Dict, List
+import orjson
 import os
-import json
-from dotenv import load_dotenv
+import struct
 
-load_dotenv('/Users/adamhunter/miniconda3/envs/ragdev/ragdev.env')
+# openai, pydantic, and dotenv are ~100 MB-class imports; defer them so
+# callers that only touch the file helpers don't pay for them at import time
+if TYPE_CHECKING:
+    from openai import OpenAI, AsyncOpenAI
+    from pydantic import BaseModel
 
-def get_openai_client() -> OpenAI:
-    """Create and return an OpenAI client instance."""
+@lru_cache(maxsize=1)
+def get_openai_client() -> "OpenAI":
+    """
+    Return a shared OpenAI client instance.
+
+    Memoized so every caller reuses one client — and with it the underlying
+    HTTP connection pool — instead of paying a fresh TLS handshake per call.
+    The .env file is only parsed on first use.
+    """
+    from dotenv import load_dotenv
+    from openai import OpenAI
+
+    load_dotenv()
     api_key = os.getenv("OPENAI_API_KEY")
     return OpenAI(api_key=api_key)
 
-def pydantic_to_json_schema(model: Type[BaseModel]) -> Dict[str, Any]:
-    """Convert a Pydantic model to a JSON schema for OpenAI's structured API."""
+@lru_cache(maxsize=1)
+def get_async_openai_client() -> "AsyncOpenAI":
+    """Return a shared AsyncOpenAI client instance (see get_openai_client)."""
+    from dotenv import load_dotenv
+    from openai import AsyncOpenAI
+
+    load_dotenv()
+    api_key = os.getenv("OPENAI_API_KEY")
+    return AsyncOpenAI(api_key=api_key)
+
+def pydantic_to_json_schema(model: Type["BaseModel"]) -> Dict[str, Any]:
+    """
+    Convert a Pydantic model to a JSON schema for OpenAI's structured API.
+
+    The result is cached on the class itself, so repeat lookups are a single
+    attribute read — no global cache dict and nothing keeping the class alive.
+    model.__dict__ is checked directly so a subclass never inherits its
+    parent's schema.
+    """
+    cached = model.__dict__.get('__openai_schema__')
+    if cached is not None:
+        return cached
+
     schema = model.model_json_schema()
-    return {
+    result = {
         "type": "json_schema",
         "json_schema": {
             "name": model.__name__,
@@ -28,35 +64,143 @@ def pydantic_to_json_schema(model: Type[BaseModel]) -> Dict[str, Any]:
             "strict": True
         }
     }
+    model.__openai_schema__ = result
+    return result
+
+# Records encoded per write: keeps each joined buffer around the size of the
+# file buffer so memory stays bounded for very large datasets
+_WRITE_CHUNK_RECORDS = 8192
+
+# Directories already created by save calls, so repeated saves into the same
+# directory skip the makedirs stat walk
+_ensured_dirs: set = set()
+
+def _ensure_dir(filepath: str):
+    """Create the file's directory once per process."""
+    dirpath = os.path.dirname(filepath)
+    if dirpath and dirpath not in _ensured_dirs:
+        os.makedirs(dirpath, exist_ok=True)
+        _ensured_dirs.add(dirpath)
 
 def save_to_jsonl(data: List[Dict[str, Any]], filepath: str):
     """Save data to a JSONL file."""
-    # Create the directory if it doesn't exist
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    
-    with open(filepath, 'w') as f:
+    _ensure_dir(filepath)
+
+    # OPT_APPEND_NEWLINE fuses the newline into the encode, one C call per record
+    with open(filepath, 'wb', buffering=1024 * 1024) as f:
+        for start in range(0, len(data), _WRITE_CHUNK_RECORDS):
+            chunk = data[start:start + _WRITE_CHUNK_RECORDS]
+            f.write(b''.join(orjson.dumps(item, option=orjson.OPT_APPEND_NEWLINE) for item in chunk))
+
+def save_to_msgpack_frames(data: List[Dict[str, Any]], filepath: str):
+    """
+    Save data as length-prefixed MessagePack frames: a 4-byte big-endian length
+    followed by the encoded record.
+
+    Much faster to encode and decode than JSONL and produces smaller files, so
+    prefer it for machine-only intermediates. Anything uploaded to OpenAI
+    (batch inputs, fine-tuning files) must stay JSONL — the API mandates it.
+    """
+    _ensure_dir(filepath)
+
+    import msgspec
+
+    encoder = msgspec.msgpack.Encoder()
+    with open(filepath, 'wb', buffering=1024 * 1024) as f:
         for item in data:
-            f.write(json.dumps(item) + '\n')
+            buf = encoder.encode(item)
+            f.write(struct.pack('>I', len(buf)) + buf)
+
+def load_msgpack_frames(filepath: str) -> List[Any]:
+    """Load records written by save_to_msgpack_frames."""
+    import msgspec
+
+    decoder = msgspec.msgpack.Decoder()
+    records = []
+    with open(filepath, 'rb') as f:
+        while True:
+            header = f.read(4)
+            if not header:
+                break
+            (length,) = struct.unpack('>I', header)
+            records.append(decoder.decode(f.read(length)))
+    return records
+
+@lru_cache(maxsize=None)
+def _completion_kwargs(
+    model: str,
+    response_model: Type["BaseModel"],
+    temperature: float,
+    timeout: int
+) -> Dict[str, Any]:
+    """Invariant chat.completions.create kwargs, frozen per configuration so
+    repeated calls only substitute the messages."""
+    return {
+        "model": model,
+        "response_format": pydantic_to_json_schema(response_model),
+        "temperature": temperature,
+        "timeout": timeout
+    }
 
 def call_openai_api(
     messages: list,
     model: str,
-    response_model: Type[BaseModel],
+    response_model: Type["BaseModel"],
     temperature: float = 0.0,
     timeout: int = 60
 ) -> Any:
     """Make a call to the OpenAI API using structured output."""
     client = get_openai_client()
-    
+
     try:
         response = client.chat.completions.create(
-            model=model,
             messages=messages,
-            response_format=pydantic_to_json_schema(response_model),
-            temperature=temperature,
-            timeout=timeout
+            **_completion_kwargs(model, response_model, temperature, timeout)
         )
         return response.choices[0].message.content
     except Exception as e:
         print(f"Error calling OpenAI API: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+async def call_openai_api_async(
+    messages: list,
+    model: str,
+    response_model: Type["BaseModel"],
+    temperature: float = 0.0,
+    timeout: int = 60
+) -> Any:
+    """Async variant of call_openai_api using the shared AsyncOpenAI client."""
+    client = get_async_openai_client()
+
+    try:
+        response = await client.chat.completions.create(
+            messages=messages,
+            **_completion_kwargs(model, response_model, temperature, timeout)
+        )
+        return response.choices[0].message.content
+    except Exception as e:
+        print(f"Error calling OpenAI API: {str(e)}")
+        raise
+
+async def call_openai_api_many(
+    message_lists: List[list],
+    model: str,
+    response_model: Type["BaseModel"],
+    temperature: float = 0.0,
+    timeout: int = 60,
+    concurrency: int = 20
+) -> List[Any]:
+    """
+    Run many structured-output calls concurrently.
+
+    Each call is network-latency-bound, so issuing them through a bounded
+    semaphore lets total wall time scale with the concurrency limit instead
+    of the number of prompts.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call_one(messages: list) -> Any:
+        async with semaphore:
+            return await call_openai_api_async(messages, model, response_model, temperature, timeout)
+
+    return await asyncio.gather(*(call_one(messages) for messages in message_lists))
\ No newline at end of file
@@ -0,0 +1,55 @@
+import pytest
+from pathlib import Path
+import os
+from src.batch_processing import upload_batch_file, create_batch_job, wait_for_batch_completion, process_batch_results
+from src.batch_preparation import prepare_batch_file
+from pydantic import BaseModel
+from tests.testing_prompts import PROMPTS, SYSTEM_PROMPT
+
+class ExampleResponseModel(BaseModel):
+    content: str
+
+@pytest.fixture(scope="session")
+def batch_files():
+    # Session-scoped so the (slow, paid) batch submission runs once and is
+    # shared by every test module that needs real batch input/output files
+    input_file = Path("data/raw/batch_inputs/example_input.jsonl")
+    output_file = Path("data/raw/batch_outputs/example_output.jsonl")
+
+    # Prepare a batch file
+    prompts = PROMPTS
+    system_message = SYSTEM_PROMPT
+    batch_file = prepare_batch_file(
+        prompts=prompts,
+        response_model=ExampleResponseModel,
+        system_message=system_message,
+        model="gpt-4o-2024-08-06",
+        max_tokens=2000,
+        save_dir=str(input_file.parent)
+    )
+
+    # Rename the batch file to example_input.jsonl
+    os.replace(batch_file, input_file)
+
+    # Upload the batch file
+    file_id = upload_batch_file(input_file)
+    assert file_id is not None
+    print(f"Uploaded batch file. File ID: {file_id}")
+
+    # Create a batch job
+    batch_id = create_batch_job(file_id)
+    assert batch_id is not None
+    print(f"Created batch job. Batch ID: {batch_id}")
+
+    # Wait for batch completion
+    completed_batch = wait_for_batch_completion(batch_id, polling_interval=10)
+    assert completed_batch.status == "completed"
+    print("Batch job completed successfully.")
+
+    # Process batch results
+    processed_output_file = process_batch_results(completed_batch.id, output_file.parent)
+
+    # Rename the output file to example_output.jsonl
+    os.replace(processed_output_file, output_file)
+
+    return input_file, output_file
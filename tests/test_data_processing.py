@@ -1,13 +1,31 @@
 import pytest
 from pathlib import Path
-import json
+from typing import List
+import orjson
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+from pydantic import BaseModel, ConfigDict, ValidationError
 from src.data_processing import prepare_finetuning_data, validate_finetuning_data
 
+class FTMessage(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+    role: str
+    content: str
+
+class FTItem(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+    messages: List[FTMessage]
+
 @pytest.fixture(scope="module")
-def example_paths():
+def example_paths(batch_files):
+    # The session-scoped batch_files fixture produces the real input/output
+    # files once, shared with test_batch_processing
+    input_file, output_file = batch_files
     return {
-        'input': Path('data/raw/batch_inputs/example_input.jsonl'),
-        'output': Path('data/raw/batch_outputs/example_output.jsonl'),
+        'input': input_file,
+        'output': output_file,
         'processed': Path('data/processed/finetuningJSONLs')
     }
 
@@ -54,41 +72,42 @@ def test_prepare_finetuning_data(example_paths, finetuning_files):
     print(f"Fine-tuning data successfully created and validated at: {train_file} and {test_file}")
 
 def read_jsonl(file_path):
-    with open(file_path, 'r') as f:
-        return [json.loads(line) for line in f]
+    if pl is not None:
+        # Polars' multithreaded Rust NDJSON reader; worthwhile for large files
+        return pl.read_ndjson(file_path).to_dicts()
+    with open(file_path, 'rb') as f:
+        return [orjson.loads(line) for line in f]
 
 def validate_item_structure(item, index):
-    assert isinstance(item, dict), f"Item {index} is not a dictionary"
-    assert list(item.keys()) == ['messages'], f"Item {index} should only have a 'messages' key, but has keys: {list(item.keys())}"
-    assert isinstance(item['messages'], list), f"Item {index}'s 'messages' value is not a list"
-    assert len(item['messages']) == 3, f"Item {index} should have 3 messages, but has {len(item['messages'])}"
-    
-    roles = [msg['role'] for msg in item['messages']]
+    # pydantic-core does the per-field type and key checking in compiled code,
+    # replacing the previous stack of Python-level asserts
+    try:
+        parsed = FTItem.model_validate(item, strict=True)
+    except ValidationError as e:
+        pytest.fail(f"Item {index} has invalid structure: {e}")
+
+    roles = [msg.role for msg in parsed.messages]
     assert roles == ['system', 'user', 'assistant'], f"Item {index} has incorrect message roles: {roles}"
-    
-    for j, msg in enumerate(item['messages']):
-        assert set(msg.keys()) == {'role', 'content'}, f"Message {j} in item {index} has incorrect keys: {set(msg.keys())}"
-        assert isinstance(msg['role'], str), f"Role in message {j} of item {index} is not a string"
-        assert isinstance(msg['content'], str), f"Content in message {j} of item {index} is not a string"
-        assert msg['content'].strip(), f"Content in message {j} of item {index} is empty or only whitespace"
-    
-    # Validate that assistant's message is valid JSON
+    for j, msg in enumerate(parsed.messages):
+        assert msg.content.strip(), f"Content in message {j} of item {index} is empty or only whitespace"
+
+    # Validate that assistant's message is valid JSON; the record itself was
+    # already parsed, so only the embedded content string needs a second pass
     try:
-        json.loads(item['messages'][2]['content'])
-    except json.JSONDecodeError:
+        orjson.loads(parsed.messages[2].content)
+    except orjson.JSONDecodeError:
         pytest.fail(f"Assistant's message in item {index} is not valid JSON")
 
 def test_examine_finetuning_files(finetuning_files):
     train_file, test_file = finetuning_files
     
+    # Print bounded previews so large fine-tuning files don't get slurped into memory
     print(f"\nExamining training file: {train_file}")
     with open(train_file, 'r') as f:
-        train_content = f.read()
-        print(train_content)
+        print(f.read(4096))
 
     print(f"\nExamining testing file: {test_file}")
     with open(test_file, 'r') as f:
-        test_content = f.read()
-        print(test_content)
+        print(f.read(4096))
 
     print("Fine-tuning files examination completed.")
\ No newline at end of file